@@ -4,19 +4,23 @@ eventlet.monkey_patch()
 
 # Now, we can import everything else
 import os
+import math
 import bcrypt
 import logging
 import threading
 import queue
 from functools import wraps
 from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 
 from database import db
 from broadcaster import Broadcaster
 from audio_engine import AudioEngine
 from youtube_handler import search_youtube, download_audio, get_video_details
+from cpu_pool import CpuPool
+from rate_limiter import RateLimiter
 from eventlet import tpool
 
 # --- Basic Setup ---
@@ -25,14 +29,26 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(threadName)s - %
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", os.urandom(24))
+# Behind a reverse proxy remote_addr is the proxy itself. Trust X-Forwarded-For from this many
+# hops so per-IP limits and votes see the real client. Leave at 0 when clients connect directly,
+# otherwise they could spoof the header.
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.getenv("TRUSTED_PROXY_HOPS", 0)))
 # This is the key: flask_socketio will use the eventlet server
 socketio = SocketIO(app, async_mode='eventlet')
 
 # --- Global Instances for Audio Streaming ---
 now_playing_queue = queue.Queue()
+player_state_queue = queue.Queue()
+# Socket.IO room that logged-in DJ sockets join on connect
+DJ_ROOM = 'dj'
 broadcaster = Broadcaster()
 # The audio engine creates its own async DB connection
-audio_engine = AudioEngine(broadcaster, now_playing_queue)
+audio_engine = AudioEngine(broadcaster, now_playing_queue, player_state_queue)
+# CPU-bound work runs in these pools instead of on the eventlet hub. Password hashing and
+# JSON get separate pools so a login flood can't make public list reads queue behind bcrypt.
+password_pool = CpuPool()
+json_pool = CpuPool()
+login_limiter = RateLimiter()
 
 
 def create_initial_admin_user():
@@ -45,7 +61,7 @@ def create_initial_admin_user():
     try:
         user = db.get('users', {'username': admin_user})
         if not user:
-            hashed_password = bcrypt.hashpw(admin_pass.encode('utf-8'), bcrypt.gensalt())
+            hashed_password = password_pool.execute(bcrypt.hashpw, admin_pass.encode('utf-8'), bcrypt.gensalt())
             db.create('users', {'username': admin_user, 'password': hashed_password, 'role': 'admin'})
             logging.info(f"Created initial admin user: {admin_user}")
     except Exception as e:
@@ -64,6 +80,45 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def run_player_command(command, data):
+    """Applies a transport command to the audio engine. Returns an error message, or None on success."""
+    if command == 'skip':
+        audio_engine.skip()
+    elif command == 'previous':
+        audio_engine.previous()
+    elif command == 'pause':
+        audio_engine.pause()
+    elif command == 'resume':
+        audio_engine.resume()
+    elif command == 'dj_live':
+        live = data.get('live')
+        if not isinstance(live, bool):
+            return "A boolean 'live' value is required"
+        audio_engine.set_dj_live(live)
+    elif command == 'seek':
+        try:
+            position = float(data.get('position'))
+        except (TypeError, ValueError):
+            return "A numeric 'position' in seconds is required"
+        if not math.isfinite(position):
+            return "A numeric 'position' in seconds is required"
+        audio_engine.seek(position)
+    else:
+        return f"Unknown player command: {command}"
+    # The engine applies the change on its next chunk and reports it via player_state_emitter
+    return None
+
+def json_response(data):
+    """Like jsonify, but serializes large lists in the JSON pool so they don't stall the hub."""
+    return Response(json_pool.dumps(data), mimetype='application/json')
+
+def emit_json(event, data):
+    """
+    Emits data as a pre-serialized JSON string (clients JSON.parse it), so large lists are
+    serialized in the JSON pool instead of by socketio.emit on the hub.
+    """
+    socketio.emit(event, json_pool.dumps(data))
+
 # --- Websocket Emitter Thread ---
 def now_playing_emitter():
     while True:
@@ -71,14 +126,43 @@ def now_playing_emitter():
         socketio.emit('now_playing', song_info)
         logging.info(f"Emitted now_playing: {song_info.get('title') if song_info else 'Silence'}")
 
+def player_state_emitter():
+    while True:
+        state = player_state_queue.get()
+        # Transport state is only for DJs, not every listener socket
+        socketio.emit('player_state', state, to=DJ_ROOM)
+
+# --- Socket.IO Handlers ---
+@socketio.on('connect')
+def handle_connect():
+    if is_logged_in():
+        join_room(DJ_ROOM)
+
+@socketio.on('player_command')
+def handle_player_command(data):
+    """Lets the dashboard drive the player over its existing socket. Replies via the ack callback."""
+    if not is_logged_in():
+        return {"error": "Unauthorized"}
+    data = data or {}
+    if not isinstance(data, dict):
+        return {"error": "Command payload must be an object"}
+    error = run_player_command(data.get('command'), data)
+    if error:
+        return {"error": error}
+    return {"status": "accepted"}
+
 # --- Core Routes (All Synchronous) ---
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
+        if not login_limiter.allow(request.remote_addr):
+            return render_template('login.html', error="Too many login attempts. Try again later."), 429
         username = request.form.get('username')
-        password = request.form.get('password')
+        password = request.form.get('password') or ''
         user = db.get('users', {'username': username})
-        if user and bcrypt.checkpw(password.encode('utf-8'), user['password']):
+        if user and password_pool.execute(bcrypt.checkpw, password.encode('utf-8'), user['password']):
+            # Only failed attempts count towards the limit
+            login_limiter.refund(request.remote_addr)
             session['logged_in'] = True
             return redirect(url_for('dashboard'))
         return render_template('login.html', error="Invalid credentials")
@@ -104,27 +188,41 @@ def audio_stream():
     def generate():
         try:
             while True:
-                chunk = client_queue.get()
-                yield chunk
+                yield broadcaster.read_batch(client_queue)
         finally:
             broadcaster.unregister(client_queue)
     return Response(generate(), mimetype='audio/mpeg')
 
 # --- API Routes (Using tpool for blocking calls) ---
+@app.route('/api/player')
+@login_required
+def player_state():
+    return jsonify(audio_engine.get_state())
+
+@app.route('/api/player/<command>', methods=['POST'])
+@login_required
+def player_command(command):
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict): return "Request body must be a JSON object", 400
+    error = run_player_command(command, data)
+    if error: return error, 400
+    # Accepted, not done: the new state follows as a player_state event
+    return jsonify({"command": command, "status": "accepted"}), 202
+
 @app.route('/api/search')
 @login_required
 def search():
     query = request.args.get('q')
     if not query: return "Query required", 400
     results = tpool.execute(search_youtube, query)
-    return jsonify(results)
+    return json_response(results)
 
 @app.route('/api/playlist', methods=['GET', 'POST'])
 @login_required
 def handle_playlist():
     if request.method == 'GET':
         playlist = db.find('playlist', {}, sort=[("order", 1)])
-        return jsonify(playlist)
+        return json_response(playlist)
     if request.method == 'POST':
         new_playlist_data = request.json
         if isinstance(new_playlist_data, list):
@@ -132,7 +230,7 @@ def handle_playlist():
                 song['order'] = i
             db.replace_collection('playlist', new_playlist_data)
             audio_engine.reload_playlist_from_db()
-            socketio.emit('playlist_updated', new_playlist_data)
+            emit_json('playlist_updated', new_playlist_data)
             return "Playlist updated", 200
         return "Invalid data format", 400
 
@@ -140,7 +238,7 @@ def handle_playlist():
 def handle_suggestions():
     if request.method == 'GET':
         suggestions = db.find('suggestions', sort=[("votes", -1)])
-        return jsonify(suggestions)
+        return json_response(suggestions)
     if request.method == 'POST':
         data = request.json
         yt_id = data.get('yt_id')
@@ -152,7 +250,7 @@ def handle_suggestions():
         suggestion = {"title": video_details.get('title', 'Untitled'), "yt_id": yt_id, "votes": 1, "voter_ips": [request.remote_addr]}
         db.create('suggestions', suggestion)
         all_suggestions = db.find('suggestions', sort=[("votes", -1)])
-        socketio.emit('suggestions_updated', all_suggestions)
+        emit_json('suggestions_updated', all_suggestions)
         return jsonify(suggestion), 201
 
 @app.route('/api/suggestions/<suggestion_id>/vote', methods=['POST'])
@@ -164,7 +262,7 @@ def vote_for_suggestion(suggestion_id):
         return "You have already voted for this song", 403
     db.update('suggestions', {'_id': suggestion_id}, {'$inc': {'votes': 1}, '$addToSet': {'voter_ips': voter_ip}})
     all_suggestions = db.find('suggestions', sort=[("votes", -1)])
-    socketio.emit('suggestions_updated', all_suggestions)
+    emit_json('suggestions_updated', all_suggestions)
     return jsonify({"success": True})
 
 @app.route('/api/promote_winner', methods=['POST'])
@@ -175,7 +273,7 @@ def promote_winner():
     winner = top_songs[0]
     if db.get('playlist', {'yt_id': winner['yt_id']}):
         db.delete_many('suggestions', {})
-        socketio.emit('suggestions_updated', [])
+        emit_json('suggestions_updated', [])
         return f"'{winner['title']}' is already in the playlist. Suggestions cleared.", 200
     filepath = tpool.execute(download_audio, winner['yt_id'])
     if not filepath: return "Failed to download song audio", 500
@@ -185,8 +283,8 @@ def promote_winner():
     db.delete_many('suggestions', {})
     audio_engine.reload_playlist_from_db()
     new_playlist = db.find('playlist', {}, sort=[("order", 1)])
-    socketio.emit('playlist_updated', new_playlist)
-    socketio.emit('suggestions_updated', [])
+    emit_json('playlist_updated', new_playlist)
+    emit_json('suggestions_updated', [])
     return f"'{winner['title']}' promoted to playlist!", 200
 
 
@@ -200,6 +298,7 @@ if __name__ == '__main__':
     audio_thread = threading.Thread(target=audio_engine.run, name="AudioEngineThread", daemon=True)
     audio_thread.start()
     socketio.start_background_task(target=now_playing_emitter)
+    socketio.start_background_task(target=player_state_emitter)
 
     port = int(os.getenv("PORT", 5000))
     logging.info(f"\n>>> Starting server on http://localhost:{port} <<<")
@@ -1,29 +1,43 @@
 import threading
 import time
 import os
+import math
 import asyncio
 import logging
 from pydub import AudioSegment
 
 from async_database import DataAccessLayer # Import from the renamed async file
 
+# Upper bound for seek targets; anything past the end of a song simply finishes it
+MAX_SEEK_SECONDS = 24 * 60 * 60
+
 class AudioEngine(threading.Thread):
-    def __init__(self, broadcaster, now_playing_queue):
+    def __init__(self, broadcaster, now_playing_queue, player_state_queue=None):
         super().__init__()
         self.daemon = True
         self.broadcaster = broadcaster
         # Create a private instance of the Async DataAccessLayer for this thread
         self.db = DataAccessLayer()
         self.now_playing_queue = now_playing_queue
+        # Receives a get_state() snapshot whenever the transport state actually changes
+        self.player_state_queue = player_state_queue
         
         # State
         self.playlist = []
         self.current_song_index = -1
         self.is_playing = True
         self.is_dj_live = False
+        self.position_seconds = 0.0
+        self.duration_seconds = 0.0
         
         self._playlist_lock = threading.Lock()
         self._reload_event = threading.Event()
+        # Set by skip/previous to cut the current song short at the next chunk
+        self._interrupt_event = threading.Event()
+        # Songs to move by on behalf of skip/previous; only the run loop applies it
+        self._pending_step = 0
+        # Pending seek target in seconds, applied by the run loop at the next chunk
+        self._seek_position = None
         self.logger = logging.getLogger("AudioEngine")
 
     def reload_playlist_from_db(self):
@@ -65,19 +79,27 @@ class AudioEngine(threading.Thread):
                 loop.run_until_complete(self._load_playlist_async())
 
             with self._playlist_lock:
-                if not self.is_playing or not self.playlist or self.current_song_index < 0:
+                if self._pending_step:
+                    self._advance(self._pending_step)
+                    self._pending_step = 0
+                # Pausing is handled inside the chunk loop so the song keeps its position
+                if not self.playlist or self.current_song_index < 0:
                     self.now_playing_queue.put({"title": "Silence..."})
                     time.sleep(1)
                     continue
                 
                 song_info = self.playlist[self.current_song_index]
+                # Any skip issued before this point has already moved the index,
+                # and a seek meant for the previous song must not land on this one
+                self._interrupt_event.clear()
+                self._seek_position = None
             
             self.now_playing_queue.put(song_info)
             song_path = song_info.get('filepath')
 
             if not song_path or not os.path.exists(song_path):
                 self.logger.warning(f"Song file not found: {song_path}. Skipping.")
-                self.next_song()
+                self._finish_song()
                 continue
             
             try:
@@ -85,22 +107,46 @@ class AudioEngine(threading.Thread):
                 song = AudioSegment.from_file(song_path)
             except Exception as e:
                 self.logger.error(f"Could not load song {song_path}: {e}")
-                self.next_song()
+                self._finish_song()
                 continue
 
             audio_stream = song.raw_data
+            frame_size = song.sample_width * song.channels
+            bytes_per_second = song.frame_rate * frame_size
+            self.broadcaster.set_byte_rate(bytes_per_second)
+            self.duration_seconds = len(audio_stream) / bytes_per_second
+            self.position_seconds = 0.0
+            self._publish_state()
             
             # This calculation ensures playback speed is roughly correct
-            sleep_duration = float(CHUNK_SIZE) / (song.frame_rate * song.sample_width * song.channels)
+            sleep_duration = float(CHUNK_SIZE) / bytes_per_second
             
             playback_interrupted = False
-            for i in range(0, len(audio_stream), CHUNK_SIZE):
-                # Check for state changes (e.g., skip, pause, reload) on every chunk
-                if not self.is_playing or self._reload_event.is_set():
+            position = 0
+            while position < len(audio_stream):
+                # Check for state changes (e.g., skip, seek, pause, reload) on every chunk
+                if self._interrupt_event.is_set() or self._reload_event.is_set():
                     playback_interrupted = True
                     break
+
+                seek_to = self._take_seek() if self._seek_position is not None else None
+                if seek_to is not None:
+                    # The song is already decoded, so seeking is just moving the read offset
+                    # (aligned to a whole frame so channels don't get swapped).
+                    position = min(int(seek_to * song.frame_rate) * frame_size, len(audio_stream))
+                    self.position_seconds = position / bytes_per_second
+                    self._publish_state()
+                    continue
+
+                if not self.is_playing:
+                    # Paused: hold our place and send silence so listener connections stay open
+                    self.broadcaster.push(bytes(CHUNK_SIZE))
+                    time.sleep(sleep_duration)
+                    continue
                 
-                chunk = audio_stream[i:i+CHUNK_SIZE]
+                chunk = audio_stream[position:position+CHUNK_SIZE]
+                position += len(chunk)
+                self.position_seconds = position / bytes_per_second
                 
                 if self.is_dj_live:
                     # Audio ducking: convert chunk to segment, lower volume, get raw data back
@@ -112,22 +158,84 @@ class AudioEngine(threading.Thread):
                 time.sleep(sleep_duration)
 
             if not playback_interrupted:
-                self.next_song()
+                self._finish_song()
 
-    def next_song(self):
+    def _take_seek(self):
+        """Returns and clears the pending seek target, if any."""
         with self._playlist_lock:
-            if not self.playlist:
-                self.current_song_index = -1
-                return
-            self.current_song_index = (self.current_song_index + 1) % len(self.playlist)
-    
-    def prev_song(self):
+            seek_to, self._seek_position = self._seek_position, None
+            return seek_to
+
+    def _advance(self, step):
+        """Moves the song index by step. Caller must hold the playlist lock."""
+        if not self.playlist:
+            self.current_song_index = -1
+            return
+        self.current_song_index = (self.current_song_index + step) % len(self.playlist)
+
+    def _finish_song(self):
+        """Moves on after a song ends or fails, unless a skip/previous already chose the next one."""
+        with self._playlist_lock:
+            if not self._pending_step:
+                self._advance(1)
+
+    def _publish_state(self):
+        """Reports the current transport state, if anyone is listening for it."""
+        if self.player_state_queue is not None:
+            self.player_state_queue.put(self.get_state())
+
+    def skip(self):
+        """Cuts the current song and starts the next one."""
+        with self._playlist_lock:
+            self._pending_step += 1
+            self._seek_position = None
+            self._interrupt_event.set()
+        self.logger.info("Skip requested.")
+
+    def previous(self):
+        """Cuts the current song and starts the previous one."""
+        with self._playlist_lock:
+            self._pending_step -= 1
+            self._seek_position = None
+            self._interrupt_event.set()
+        self.logger.info("Previous requested.")
+
+    def pause(self):
+        self.logger.info("Playback paused.")
+        self.is_playing = False
+        self._publish_state()
+
+    def resume(self):
+        self.logger.info("Playback resumed.")
+        self.is_playing = True
+        self._publish_state()
+
+    def seek(self, seconds):
+        """Jumps to an offset (in seconds) within the current song."""
+        seconds = float(seconds)
+        if math.isnan(seconds):
+            self.logger.warning("Ignoring seek to NaN.")
+            return
+        # Clamp so the run loop can always turn the target into a byte offset
+        seconds = min(max(0.0, seconds), MAX_SEEK_SECONDS)
+        with self._playlist_lock:
+            self._seek_position = seconds
+        self.logger.info(f"Seek requested to {seconds}s.")
+
+    def get_state(self):
+        """Returns a snapshot of the transport state for the API and dashboard."""
         with self._playlist_lock:
-            if not self.playlist:
-                self.current_song_index = -1
-                return
-            self.current_song_index = (self.current_song_index - 1 + len(self.playlist)) % len(self.playlist)
+            song_info = self.playlist[self.current_song_index] if 0 <= self.current_song_index < len(self.playlist) else None
+        return {
+            "title": song_info.get('title') if song_info else None,
+            "index": self.current_song_index,
+            "is_playing": self.is_playing,
+            "is_dj_live": self.is_dj_live,
+            "position": self.position_seconds,
+            "duration": self.duration_seconds,
+        }
     
     def set_dj_live(self, is_live):
         self.logger.info(f"DJ Live status changed to: {is_live}")
-        self.is_dj_live = is_live
\ No newline at end of file
+        self.is_dj_live = is_live
+        self._publish_state()
\ No newline at end of file
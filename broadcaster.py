@@ -1,16 +1,33 @@
+import os
+import time
 import queue
 import threading
 import logging
 
+# Chunks buffered per listener
+CLIENT_QUEUE_SIZE = 20
+# A batching wait longer than the time the queue takes to fill overflows it and drops audio,
+# so never wait longer than this fraction of that fill time
+QUEUE_HEADROOM = 0.7
+# PCM byte rate assumed until the audio engine reports the real one (44.1 kHz 16-bit stereo)
+DEFAULT_BYTE_RATE = 44100 * 2 * 2
+
 class Broadcaster:
     """
     Manages multiple client queues to broadcast data to all of them.
     This is used to distribute the audio stream to every connected listener.
     """
-    def __init__(self):
+    def __init__(self, target_latency=None, max_batch_bytes=None):
         self.clients = set()
         self._lock = threading.Lock()
         self.logger = logging.getLogger("Broadcaster")
+        # How long a listener may wait to accumulate a batch before it is written out.
+        # read_batch caps this to fit the client queue at the current byte rate.
+        target_latency = target_latency if target_latency is not None else float(os.getenv("STREAM_TARGET_LATENCY_MS", 50)) / 1000.0
+        self.target_latency = max(0.0, target_latency)
+        self.byte_rate = DEFAULT_BYTE_RATE
+        # Upper bound on a single write; a batch can never exceed what the client queue holds anyway
+        self.max_batch_bytes = max_batch_bytes if max_batch_bytes is not None else int(os.getenv("STREAM_MAX_BATCH_BYTES", 16384))
 
     def register(self):
         """
@@ -19,7 +36,7 @@ class Broadcaster:
         """
         with self._lock:
             # Use a bounded queue to prevent a single slow client from crashing the server
-            client_queue = queue.Queue(maxsize=20) 
+            client_queue = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
             self.clients.add(client_queue)
             self.logger.info(f"Client registered. Total clients: {len(self.clients)}")
             return client_queue
@@ -42,4 +59,35 @@ class Broadcaster:
                 except queue.Full:
                     # A client is lagging. We'll let them miss this chunk.
                     # This prevents one slow listener from halting the stream for everyone.
-                    pass
\ No newline at end of file
+                    pass
+
+    def set_byte_rate(self, bytes_per_second):
+        """Called by the audio engine for each song so batching waits fit its format."""
+        self.byte_rate = bytes_per_second
+
+    def read_batch(self, client_queue):
+        """
+        Blocks for the next chunk, waits out the target latency so more audio can pile up
+        (unless a full batch is already queued, so a lagging client catches up), then
+        drains the client's queue (up to max_batch_bytes) into a single buffer.
+        One larger write and one wakeup per batch replaces a write and a greenlet
+        switch for every 1 KB chunk.
+        """
+        first = client_queue.get()
+        batch_ready = client_queue.full() or (client_queue.qsize() + 1) * len(first) >= self.max_batch_bytes
+        # Time for the queue to fill at the current format; waiting longer would drop chunks
+        fill_time = CLIENT_QUEUE_SIZE * len(first) / self.byte_rate
+        latency = min(self.target_latency, fill_time * QUEUE_HEADROOM)
+        if latency > 0 and not batch_ready:
+            time.sleep(latency)
+        chunks = [first]
+        size = len(first)
+        while size < self.max_batch_bytes:
+            try:
+                chunk = client_queue.get_nowait()
+            except queue.Empty:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        # Avoid the join copy entirely when nothing else arrived
+        return first if len(chunks) == 1 else b''.join(chunks)
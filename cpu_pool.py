@@ -0,0 +1,33 @@
+import os
+import json
+import logging
+from eventlet import tpool
+from eventlet.semaphore import Semaphore
+
+class CpuPool:
+    """
+    Runs CPU-bound work (bcrypt, large JSON dumps) on eventlet's native thread pool.
+    C calls like bcrypt.checkpw never yield, so running them on the hub would freeze
+    every /stream.mp3 generator and Socket.IO emit until they finish.
+    The semaphore bounds how many jobs may occupy real threads at once, so a burst of
+    CPU work cannot take over the tpool threads that search/download calls also use.
+    Use separate pools for unrelated kinds of work so one cannot queue behind the other.
+    """
+    def __init__(self, max_workers=None, min_offload_items=None):
+        # At least one slot, otherwise every job would wait forever
+        self.max_workers = max(1, max_workers if max_workers is not None else int(os.getenv("CPU_POOL_SIZE", 2)))
+        # Lists shorter than this are cheaper to serialize inline than to hand to a thread
+        self.min_offload_items = min_offload_items if min_offload_items is not None else int(os.getenv("JSON_OFFLOAD_MIN_ITEMS", 200))
+        self._slots = Semaphore(self.max_workers)
+        self.logger = logging.getLogger("CpuPool")
+
+    def execute(self, func, *args, **kwargs):
+        """Runs func in a native thread and cooperatively waits for its result."""
+        with self._slots:
+            return tpool.execute(func, *args, **kwargs)
+
+    def dumps(self, data):
+        """Serializes data to a JSON string, off the hub if it is a large list."""
+        if not isinstance(data, list) or len(data) < self.min_offload_items:
+            return json.dumps(data, default=str)
+        return self.execute(json.dumps, data, default=str)
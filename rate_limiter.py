@@ -0,0 +1,53 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter keyed by client (usually the remote IP).
+    Used to stop login floods from queueing up expensive bcrypt checks.
+    """
+    def __init__(self, max_attempts=None, window_seconds=None):
+        self.max_attempts = max_attempts if max_attempts is not None else int(os.getenv("LOGIN_RATE_LIMIT", 5))
+        self.window_seconds = window_seconds if window_seconds is not None else float(os.getenv("LOGIN_RATE_WINDOW", 60))
+        self._attempts = {}
+        self._last_prune = time.monotonic()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger("RateLimiter")
+
+    def allow(self, key):
+        """Records an attempt for key. Returns False if key is over its limit."""
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._attempts.setdefault(key, deque())
+            # Drop attempts that have fallen out of the window
+            while attempts and now - attempts[0] > self.window_seconds:
+                attempts.popleft()
+            if len(attempts) >= self.max_attempts:
+                self.logger.warning(f"Rate limit exceeded for {key}")
+                return False
+            attempts.append(now)
+            self._prune(now)
+            return True
+
+    def refund(self, key):
+        """
+        Gives back one attempt recorded by allow(), e.g. after a successful login,
+        so that only failures count towards the limit.
+        """
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts:
+                attempts.pop()
+
+    def _prune(self, now):
+        """Forgets clients whose attempts have all expired, at most once per window."""
+        if now - self._last_prune < self.window_seconds:
+            return
+        self._last_prune = now
+        stale = [key for key, attempts in self._attempts.items()
+                 if not attempts or now - attempts[-1] > self.window_seconds]
+        for key in stale:
+            del self._attempts[key]
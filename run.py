@@ -6,7 +6,7 @@ import logging
 import threading
 import subprocess
 
-from app import app, socketio, create_initial_admin_user, audio_engine, now_playing_emitter
+from app import app, socketio, create_initial_admin_user, audio_engine, now_playing_emitter, player_state_emitter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
@@ -24,6 +24,8 @@ def main():
 
     # Start the websocket emitter for 'now playing' updates
     socketio.start_background_task(target=now_playing_emitter)
+    # Start the websocket emitter for DJ transport state updates
+    socketio.start_background_task(target=player_state_emitter)
 
     port = int(os.getenv("PORT", 5000))
     host = '0.0.0.0'
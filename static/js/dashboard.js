@@ -9,6 +9,11 @@ document.addEventListener('DOMContentLoaded', () => {
     const searchResultsEl = document.getElementById('search-results');
     const suggestionsListDj = document.getElementById('suggestions-list-dj');
     const promoteBtn = document.getElementById('promote-winner-btn');
+    const playerStatusEl = document.getElementById('player-status');
+    const playerControls = document.querySelector('.player-controls');
+    const seekForm = document.getElementById('seek-form');
+    const seekInput = document.getElementById('seek-input');
+    const djLiveToggle = document.getElementById('dj-live-toggle');
 
     let playlist = [];
     let sortable = new Sortable(playlistEl, {
@@ -49,6 +54,21 @@ document.addEventListener('DOMContentLoaded', () => {
         promoteBtn.disabled = suggestions.length === 0;
     };
 
+    const renderPlayerState = (state) => {
+        const title = state.title || 'Nothing';
+        const status = state.is_playing ? 'Playing' : 'Paused';
+        playerStatusEl.textContent = `${status}: ${title} (${Math.floor(state.position)}s / ${Math.floor(state.duration)}s)`;
+        djLiveToggle.checked = state.is_dj_live;
+    };
+
+    const sendPlayerCommand = (command, data = {}) => {
+        socket.emit('player_command', { command, ...data }, (response) => {
+            if (response && response.error) {
+                alert(`Error: ${response.error}`);
+            }
+        });
+    };
+
     const renderSearchResults = (results) => {
         searchResultsEl.innerHTML = '';
         results.forEach(video => {
@@ -114,19 +134,39 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    playerControls.addEventListener('click', (e) => {
+        if (e.target.dataset.command) {
+            sendPlayerCommand(e.target.dataset.command);
+        }
+    });
+
+    seekForm.addEventListener('submit', (e) => {
+        e.preventDefault();
+        if (seekInput.value === '') return;
+        sendPlayerCommand('seek', { position: Number(seekInput.value) });
+    });
+
+    djLiveToggle.addEventListener('change', () => {
+        sendPlayerCommand('dj_live', { live: djLiveToggle.checked });
+    });
+
     // --- Socket.IO Listeners ---
+    // List updates arrive as JSON strings, serialized off the server's event loop
     socket.on('playlist_updated', (newPlaylist) => {
         console.log('Playlist updated via WebSocket.');
-        playlist = newPlaylist;
+        playlist = JSON.parse(newPlaylist);
         renderPlaylist();
     });
 
     socket.on('suggestions_updated', (suggestions) => {
         console.log('Suggestions updated via WebSocket.');
-        renderDjSuggestions(suggestions);
+        renderDjSuggestions(JSON.parse(suggestions));
     });
 
+    socket.on('player_state', renderPlayerState);
+
     // --- Initial Load ---
+    fetch('/api/player').then(response => response.json()).then(renderPlayerState);
     fetchPlaylist();
     fetchDjSuggestions();
 });
\ No newline at end of file
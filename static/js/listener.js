@@ -77,7 +77,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
     socket.on('suggestions_updated', (suggestions) => {
         console.log('Suggestions updated via WebSocket.');
-        renderSuggestions(suggestions);
+        // Sent as a JSON string, serialized off the server's event loop
+        renderSuggestions(JSON.parse(suggestions));
     });
 
     // --- Initial Load ---